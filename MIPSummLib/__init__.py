@@ -0,0 +1,355 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import csv
+import datetime
+import importlib
+import json
+
+# %% notes
+"""
+Created on Sat Nov 16 06:34:21 2024
+
+Paul J. Durack 16 November 2024
+
+This python library holds a number of reusable functions
+being used in this repo
+
+2024-
+PJD 16 Nov 2024 - started
+PJD 17 Nov 2024 - updated serpapi call to use cluster vs doi query
+PJD 18 Nov 2024 - add updateLineColours func
+PJD 22 Jan 2025 - tweak pullstats to deal with int64 string mapping (cfmip, omip2)
+                  citation before publication
+PJD 23 Jan 2025 - augmented pullstats to track citeStart, pub and end yrs
+PJD 24 Jan 2025 - add padCitationCounts
+PJD 28 Feb 2025 - updated to deal with ar2/gates gsch author=researchgate.net
+PJD 19 Oct 2026 - add Publication/PublicationRegistry, loadPublications and
+                  harvestPublications; publication list now in publications.json
+PJD 19 Oct 2026 - add loadWosExports, bulk offline ingest of WoS savedrecs and
+                  citation report exports; split buildCiteStats from pullStats
+PJD 19 Oct 2026 - add readFootprintCsvs, lifted from notebook Fig2 cell
+PJD 19 Oct 2026 - add footprint statistics; footprintIngest, rollingMean,
+                  activityShares and incremental RollingFootprintStats
+PJD 19 Oct 2026 - add memory-mapped FootprintCube (day x experiment x source),
+                  buildFootprintCube, openFootprintCube and footprintDateList
+PJD 19 Oct 2026 - split into a package; fast-importing core (registry, WoS
+                  export readers) with network (requests), numeric (numpy)
+                  and plotting submodules loaded lazily on first attribute use
+PJD 19 Oct 2026 - add cvs submodule, indexed CMIP6_CVs loader for Fig. 1 counts
+PJD 19 Oct 2026 - add harvest submodule, SQLite work queue for sharded
+                  multi-node/multi-key harvests (runHarvest.py)
+
+@author: durack1
+"""
+
+
+# %% lazy submodules
+# attribute: submodule, imported on first use so importing the core stays
+# cheap for worker processes - see benchImport.py
+_lazyAttrs = {
+    "AllocationExceeded": "harvest",
+    "completeJob": "harvest",
+    "enqueueRegistry": "harvest",
+    "failJob": "harvest",
+    "leaseJob": "harvest",
+    "mergeResults": "harvest",
+    "openQueue": "harvest",
+    "queueStatus": "harvest",
+    "releaseJob": "harvest",
+    "runJob": "harvest",
+    "runWorker": "harvest",
+    "cvCounts": "cvs",
+    "cvFiles": "cvs",
+    "indexCVs": "cvs",
+    "instCountries": "cvs",
+    "loadCVs": "cvs",
+    "summariseCVs": "cvs",
+    "apiKeyG": "network",
+    "apiKeyW": "network",
+    "getSession": "network",
+    "grabCitationReport": "network",
+    "grabGoogleScholarCites": "network",
+    "grabQueryId": "network",
+    "grabQueryReport": "network",
+    "grabRecordSummary": "network",
+    "grabWosCitations": "network",
+    "harvestPublications": "network",
+    "pullStats": "network",
+    "SerpApiError": "network",
+    "serpQuotaErrors": "network",
+    "singleFlight": "network",
+    "WOS_API_URL": "network",
+    "WoSStarter_API_URL": "network",
+    "activityShares": "numeric",
+    "buildCiteStats": "numeric",
+    "buildFootprintCube": "numeric",
+    "FootprintCube": "numeric",
+    "footprintIngest": "numeric",
+    "loadWosExports": "numeric",
+    "openFootprintCube": "numeric",
+    "padCiteCounts": "numeric",
+    "readFootprintCsvs": "numeric",
+    "RollingFootprintStats": "numeric",
+    "rollingMean": "numeric",
+    "updateLineColours": "plotting",
+}
+
+
+def __getattr__(name):
+    if name in _lazyAttrs:
+        mod = importlib.import_module("." + _lazyAttrs[name], __name__)
+        attr = getattr(mod, name)
+        globals()[name] = attr  # cache, later lookups skip __getattr__
+
+        return attr
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_lazyAttrs.keys()))
+
+
+# %% class defs
+
+
+class Publication:
+    """
+    Compact publication record, one per registry entry
+    """
+
+    __slots__ = ("key", "group", "strId", "doi", "wosId", "gschId")
+
+    def __init__(self, key, group, strId, doi, wosId, gschId):
+        self.key = key
+        self.group = group
+        self.strId = strId
+        self.doi = doi
+        self.wosId = wosId
+        self.gschId = gschId
+
+    def __repr__(self):
+        return "Publication({!r}, {!r})".format(self.key, self.strId)
+
+
+class PublicationRegistry:
+    """
+    Ordered publication records with O(1) lookups by key, DOI, WoS UT and
+    Google Scholar cluster id - iterate directly to harvest/aggregate
+    """
+
+    __slots__ = ("_records", "_byKey", "_byDoi", "_byWos", "_byGsch")
+
+    def __init__(self, records=()):
+        self._records = []
+        self._byKey, self._byDoi, self._byWos, self._byGsch = [{} for _ in range(4)]
+        for rec in records:
+            self.add(rec)
+
+    def __contains__(self, key):
+        return key in self._byKey
+
+    def __getitem__(self, key):
+        return self._byKey[key]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, rec):
+        """
+        Add record and index it, keys must be unique
+        """
+        if rec.key in self._byKey:
+            raise KeyError("Duplicate publication key: {}".format(rec.key))
+        self._records.append(rec)
+        self._byKey[rec.key] = rec
+        if rec.doi:
+            self._byDoi[normDoi(rec.doi)] = rec
+        if rec.wosId:
+            self._byWos[normWosId(rec.wosId)] = rec
+        if rec.gschId:
+            self._byGsch[str(rec.gschId)] = rec
+
+    def byDoi(self, doi):
+        return self._byDoi.get(normDoi(doi))
+
+    def byGsch(self, gschId):
+        return self._byGsch.get(str(gschId))
+
+    def byWos(self, wosId):
+        return self._byWos.get(normWosId(wosId))
+
+    def group(self, group):
+        """
+        Iterate records of a single group, e.g. "overview" or "community"
+        """
+        return (rec for rec in self._records if rec.group == group)
+
+    def keys(self):
+        return list(self._byKey.keys())
+
+
+# %% function defs
+
+
+def convertToFloat(inList):
+    """
+    Convert all list integers to float type
+    """
+    return [float(x) for x in inList]
+
+
+def footprintDateList(endTime, startTime=datetime.date(2018, 7, 2)):
+    """
+    Daily date axis shared by footprint loaders, from the first CMIP6
+    publication poll to the day before endTime
+    """
+    times = endTime - startTime
+
+    return [startTime + datetime.timedelta(days=x) for x in range(times.days)]
+
+
+def loadPublications(filePath="publications.json"):
+    """
+    Load publication registry from json, grouped "key": [strId, DOI, WoSId,
+    GSchId] entries matching the notebook data dicts
+    """
+    with open(filePath, "r") as f:
+        groups = json.load(f)
+    registry = PublicationRegistry()
+    for group, entries in groups.items():
+        for key, vals in entries.items():
+            if key == "key":
+                continue
+            registry.add(Publication(key, group, *vals))
+
+    return registry
+
+
+def normDoi(doi):
+    """
+    Normalise DOI for lookups, DOIs are case insensitive
+    """
+    doi = doi.strip().lower()
+    for prefix in ("https://doi.org/", "http://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix) :]
+
+    return doi
+
+
+def normWosId(wosId):
+    """
+    Normalise WoS UT for lookups, drop "WOS:" prefix
+    """
+    wosId = wosId.strip().upper()
+    if wosId.startswith("WOS:"):
+        wosId = wosId[4:]
+
+    return wosId
+
+
+def openWosExport(filePath):
+    """
+    Open WoS export text, older exports are UTF-16 with BOM, newer UTF-8
+    """
+    with open(filePath, "rb") as f:
+        bom = f.read(2)
+    if bom in (b"\xff\xfe", b"\xfe\xff"):
+        encoding = "utf-16"
+    else:
+        encoding = "utf-8-sig"
+
+    return open(filePath, "r", encoding=encoding, newline="")
+
+
+def readWosCitationReport(filePath):
+    """
+    Stream a WoS citation report export (tab or comma delimited), skipping
+    the summary header lines - yields dicts of UT, DOI, PY, TC, CitingYears
+    """
+    delimiter = "," if filePath.lower().endswith(".csv") else "\t"
+    with openWosExport(filePath) as f:
+        header = None
+        for row in csv.reader(f, delimiter=delimiter):
+            row = [x.strip() for x in row]
+            if header is None:
+                if "Total Citations" in row:
+                    header = row
+                    utInd = [c for c, x in enumerate(row) if x.startswith("UT")]
+                    utInd = utInd[0] if utInd else None
+                    doiInd = row.index("DOI") if "DOI" in row else None
+                    pyInd = row.index("Publication Year")
+                    tcInd = row.index("Total Citations")
+                    yrInds = [(c, x) for c, x in enumerate(row) if x.isdigit()]
+                continue
+            if len(row) < len(header):
+                continue
+            citingYears = {}
+            for c, yr in yrInds:
+                if row[c] not in ["", "0"]:
+                    citingYears[yr] = int(row[c])
+            yield {
+                "UT": row[utInd] if utInd is not None else "",
+                "DOI": row[doiInd] if doiInd is not None else "",
+                "PY": int(row[pyInd]) if row[pyInd].isdigit() else None,
+                "TC": int(row[tcInd]) if row[tcInd].isdigit() else None,
+                "CitingYears": citingYears,
+            }
+
+
+def readWosRecords(filePath):
+    """
+    Stream WoS savedrecs exports, tab-delimited or plain text (FN/ER
+    tagged) - yields dicts of UT, DOI, PY, TC, AU
+    """
+
+    def recOut(tags):
+        return {
+            "UT": tags.get("UT", ""),
+            "DOI": tags.get("DI", ""),
+            "PY": int(tags["PY"]) if tags.get("PY", "").isdigit() else None,
+            "TC": int(tags["TC"]) if tags.get("TC", "").isdigit() else None,
+            "AU": [x.strip() for x in tags.get("AU", "").split(";") if x.strip()],
+        }
+
+    with openWosExport(filePath) as f:
+        first = f.readline()
+        if first.startswith("FN "):
+            # plain text - two character tags, continuation lines indented
+            tags, kw = {}, None
+            for line in f:
+                line = line.rstrip("\r\n")
+                if line.startswith("ER"):
+                    yield recOut(tags)
+                    tags, kw = {}, None
+                elif line.startswith("   ") and kw is not None:
+                    tags[kw] = "; ".join([tags[kw], line.strip()])
+                elif len(line) > 2 and line[2] == " ":
+                    kw = line[:2]
+                    tags[kw] = line[3:].strip()
+        else:
+            header = [x.strip() for x in first.rstrip("\r\n").split("\t")]
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if not row:
+                    continue
+                yield recOut(dict(zip(header, row)))
+
+
+def wosExportType(filePath):
+    """
+    Sniff WoS export type, "citationReport" or "records" (savedrecs)
+    """
+    with openWosExport(filePath) as f:
+        for count, line in enumerate(f):
+            if "Total Citations" in line:
+                return "citationReport"
+            if count > 30:
+                break
+
+    return "records"
@@ -0,0 +1,189 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import glob
+import hashlib
+import json
+import os
+import re
+
+# %% notes
+"""
+Created on Mon Oct 19 11:20:37 2026
+
+MIPSummLib controlled vocabulary (CV) functions - index a local
+CMIP6_CVs (or CMIP6Plus_CVs, same layout) checkout and compute the Fig. 1
+era summary counts, see https://github.com/WCRP-CMIP/CMIP6_CVs
+
+PJD 19 Oct 2026 - started
+PJD 19 Oct 2026 - cvFiles exact <prefix>_<cvName>.json match, error on several
+
+@author: durack1
+"""
+
+# %% define CV constants
+# CV files indexed, <prefix>_<cvName>.json
+cvNames = ["activity_id", "experiment_id", "institution_id", "source_id"]
+
+# %% function defs
+
+
+def cvCounts(cvIndex) -> dict:
+    """
+    Fig. 1 style counts (experiments, models, institutions, countries, mips)
+    for an indexed CV, institutions and countries are those with registered
+    sources. Per-activity experiment and model counts under "activities"
+    """
+    institutions = set()
+    for src in cvIndex["source_id"].values():
+        institutions.update(src["institution_id"])
+    countries = set()
+    for inst in institutions:
+        countries.update(cvIndex["institution_id"].get(inst, {}).get("countries", []))
+    activities = {}
+    for act, info in cvIndex["activity_id"].items():
+        activities[act] = {
+            "experiments": len(info["experiments"]),
+            "models": len(info["sources"]),
+        }
+
+    return {
+        "experiments": len(cvIndex["experiment_id"]),
+        "models": len(cvIndex["source_id"]),
+        "institutions": len(institutions),
+        "countries": len(countries),
+        "mips": len(cvIndex["activity_id"]),
+        "activities": activities,
+    }
+
+
+def cvFiles(cvPath) -> dict:
+    """
+    Locate <prefix>_<cvName>.json files in a CV checkout, the prefix has
+    no "_" so e.g. CMIP6_sub_experiment_id.json is not an experiment_id CV
+    """
+    files = {}
+    for cvName in cvNames:
+        pattern = re.compile("^[^_]+_" + re.escape(cvName) + r"\.json$")
+        matches = sorted(
+            x
+            for x in glob.glob(os.path.join(cvPath, "*_" + cvName + ".json"))
+            if pattern.match(os.path.basename(x))
+        )
+        if not matches:
+            raise FileNotFoundError("No {} CV found in {}".format(cvName, cvPath))
+        if len(matches) > 1:
+            raise ValueError(
+                "Multiple {} CVs found in {}: {}".format(
+                    cvName, cvPath, [os.path.basename(x) for x in matches]
+                )
+            )
+        files[cvName] = matches[0]
+
+    return files
+
+
+def instCountries(description) -> list:
+    """
+    Pull countries from institution_id descriptions, the last comma
+    separated entry of each ";" separated institution address
+    """
+    countries = []
+    for inst in description.split(";"):
+        country = inst.split(",")[-1].strip().rstrip(".)").strip()
+        if country and country not in countries:
+            countries.append(country)
+
+    return countries
+
+
+def indexCVs(files) -> dict:
+    """
+    Parse CV files into experiment_id, source_id, institution_id and
+    activity_id indexes with their cross-references
+    """
+    cvs = {}
+    for cvName, filePath in files.items():
+        with open(filePath, "r") as f:
+            cvs[cvName] = json.load(f)[cvName]
+
+    index = {
+        "activity_id": {
+            act: {"description": desc, "experiments": [], "sources": []}
+            for act, desc in cvs["activity_id"].items()
+        },
+        "experiment_id": {},
+        "institution_id": {},
+        "source_id": {},
+    }
+    for inst, desc in cvs["institution_id"].items():
+        index["institution_id"][inst] = {
+            "description": desc,
+            "countries": instCountries(desc),
+            "sources": [],
+        }
+    for exp, info in cvs["experiment_id"].items():
+        acts = info.get("activity_id", [])
+        index["experiment_id"][exp] = {"activity_id": acts}
+        for act in acts:
+            index["activity_id"].setdefault(
+                act, {"description": "", "experiments": [], "sources": []}
+            )["experiments"].append(exp)
+    for src, info in cvs["source_id"].items():
+        insts = info.get("institution_id", [])
+        acts = info.get("activity_participation", [])
+        index["source_id"][src] = {"institution_id": insts, "activity_id": acts}
+        for inst in insts:
+            index["institution_id"].setdefault(
+                inst, {"description": "", "countries": [], "sources": []}
+            )["sources"].append(src)
+        for act in acts:
+            index["activity_id"].setdefault(
+                act, {"description": "", "experiments": [], "sources": []}
+            )["sources"].append(src)
+
+    return index
+
+
+def loadCVs(cvPath, cachePath=None) -> dict:
+    """
+    Index a local CV checkout, reusing a cached index when the hash of
+    the CV files is unchanged
+    """
+    files = cvFiles(cvPath)
+    h = hashlib.sha256()
+    for cvName in cvNames:
+        with open(files[cvName], "rb") as f:
+            h.update(f.read())
+    fileHash = h.hexdigest()
+
+    if cachePath is not None and os.path.exists(cachePath):
+        with open(cachePath, "r") as f:
+            cache = json.load(f)
+        if cache.get("hash") == fileHash:
+            return cache["index"]
+
+    index = indexCVs(files)
+    if cachePath is not None:
+        with open(cachePath, "w") as f:
+            json.dump({"hash": fileHash, "index": index}, f)
+
+    return index
+
+
+def summariseCVs(cvPaths, cachePath=None) -> dict:
+    """
+    Era summary counts for {era: cvPath}, e.g. {"CMIP6": ".../CMIP6_CVs"},
+    cachePath is a directory holding one index cache per era
+    """
+    summary = {}
+    for era, cvPath in cvPaths.items():
+        eraCache = None
+        if cachePath is not None:
+            os.makedirs(cachePath, exist_ok=True)
+            eraCache = os.path.join(cachePath, era + "_CVindex.json")
+        summary[era] = cvCounts(loadCVs(cvPath, eraCache))
+
+    return summary
@@ -0,0 +1,296 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import json
+import math
+import os
+import socket
+import sqlite3
+import time
+
+# %% notes
+"""
+Created on Mon Oct 19 13:05:52 2026
+
+MIPSummLib sharded harvest - pullStats/grabGoogleScholarCites jobs held in
+a SQLite work queue with leases and retries. Workers on several nodes,
+each with its own API keys, lease jobs and write results back; results
+are merged into the dataDic snapshot format. See runHarvest.py
+
+Nodes need to share the queue file - SQLite locking over some network
+filesystems (e.g. older NFS) is unreliable, keep the queue on a
+filesystem with working POSIX locks
+
+PJD 19 Oct 2026 - started
+PJD 19 Oct 2026 - SerpAPI allocation exceeded releases gsch jobs without
+                  using an attempt; dead final-attempt leases marked failed;
+                  mergeResults emits every queued key
+PJD 19 Oct 2026 - only SerpAPI quota errors release jobs, other SerpAPI
+                  errors use up attempts
+
+@author: durack1
+"""
+
+# %% define queue schema
+queueSchema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    doi TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leaseOwner TEXT,
+    leaseExpires REAL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (key, kind)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# %% function defs
+
+
+class AllocationExceeded(Exception):
+    """
+    Worker API key has no allocation left, the job is released for
+    another worker rather than retried
+    """
+
+
+def completeJob(conn, jobId, owner, result) -> bool:
+    """
+    Store a job result, False if the lease was lost to another worker
+    """
+    with conn:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL "
+            "WHERE id = ? AND leaseOwner = ? AND status = 'leased'",
+            (json.dumps(result), jobId, owner),
+        )
+
+    return cur.rowcount == 1
+
+
+def enqueueRegistry(conn, registry, group=None, gsch=True, padLen=None) -> int:
+    """
+    Queue a wos job per registry record with a WoSId and a gsch job per
+    record, already queued jobs are left alone. padLen fixes the wosPad
+    length for all workers, default 1990 (FANGIO) to current year
+    """
+    if padLen is None:
+        padLen = time.localtime().tm_year - 1990 + 1
+    recs = registry if group is None else registry.group(group)
+    jobs = []
+    for rec in recs:
+        if rec.wosId:
+            jobs.append((rec.key, "wos", rec.wosId, rec.doi))
+        if gsch:
+            jobs.append((rec.key, "gsch", rec.gschId, rec.doi))
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO meta (name, value) VALUES ('padLen', ?)",
+            (str(padLen),),
+        )
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (key, kind, ident, doi) VALUES (?, ?, ?, ?)",
+            jobs,
+        )
+        added = conn.total_changes - before
+
+    return added
+
+
+def failJob(conn, jobId, owner, error, maxAttempts=5) -> None:
+    """
+    Release a failed job for retry, or mark it failed after maxAttempts
+    """
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' "
+            "ELSE 'pending' END, error = ?, leaseOwner = NULL, leaseExpires = NULL "
+            "WHERE id = ? AND leaseOwner = ?",
+            (maxAttempts, str(error), jobId, owner),
+        )
+
+
+def leaseJob(conn, owner, leaseSecs=600, maxAttempts=5, kinds=("wos", "gsch")):
+    """
+    Atomically lease the next pending (or lease expired) job, returns a
+    job dict or None when nothing is available
+    """
+    now = time.time()
+    kindSql = ",".join("?" for _ in kinds)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # worker died on its final attempt, no retries left
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'lease expired', "
+            "leaseOwner = NULL, leaseExpires = NULL "
+            "WHERE status = 'leased' AND leaseExpires < ? AND attempts >= ?",
+            (now, maxAttempts),
+        )
+        row = conn.execute(
+            "SELECT id, key, kind, ident, doi, attempts FROM jobs "
+            "WHERE kind IN ({}) AND attempts < ? AND (status = 'pending' OR "
+            "(status = 'leased' AND leaseExpires < ?)) "
+            "ORDER BY attempts, id LIMIT 1".format(kindSql),
+            (*kinds, maxAttempts, now),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', leaseOwner = ?, leaseExpires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (owner, now + leaseSecs, row[0]),
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+
+    return dict(zip(["id", "key", "kind", "ident", "doi", "attempts"], row))
+
+
+def mergeResults(conn, dataDic=None) -> dict:
+    """
+    Merge completed jobs into the dataDic snapshot format, every queued
+    key gets an entry as in harvestPublications - wos/wosPad default to []
+    and gsch to None, or to existing dataDic values when jobs are not done
+    """
+    if dataDic is None:
+        dataDic = {}
+    keys = conn.execute("SELECT key FROM jobs GROUP BY key ORDER BY MIN(id)")
+    for (key,) in keys.fetchall():
+        entry = dataDic.setdefault(key, {})
+        entry.setdefault("wos", [])
+        entry.setdefault("wosPad", [])
+        entry.setdefault("gsch", None)
+    rows = conn.execute(
+        "SELECT key, result FROM jobs WHERE status = 'done' ORDER BY id"
+    ).fetchall()
+    for key, result in rows:
+        dataDic[key].update(json.loads(result))
+
+    return dataDic
+
+
+def openQueue(dbPath) -> sqlite3.Connection:
+    """
+    Open (creating if needed) a harvest queue, transactions are managed
+    explicitly so leases are taken under BEGIN IMMEDIATE
+    """
+    conn = sqlite3.connect(dbPath, timeout=60, isolation_level=None)
+    conn.executescript(queueSchema)
+
+    return conn
+
+
+def queueStatus(conn) -> dict:
+    """
+    Job counts by kind and status
+    """
+    status = {}
+    for kind, state, count in conn.execute(
+        "SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status"
+    ):
+        status.setdefault(kind, {})[state] = count
+
+    return status
+
+
+def releaseJob(conn, jobId, owner, error=None) -> None:
+    """
+    Return a leased job to pending without using up an attempt
+    """
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, "
+            "error = ?, leaseOwner = NULL, leaseExpires = NULL "
+            "WHERE id = ? AND leaseOwner = ? AND status = 'leased'",
+            (error, jobId, owner),
+        )
+
+
+def runJob(job, padArray) -> dict:
+    """
+    Run one job, results in dataDic entry form
+    """
+    from .network import SerpApiError, grabGoogleScholarCites, pullStats
+
+    if job["kind"] == "wos":
+        pubYr, _, noPad, pad, _, citeStartYr, citeEndYr = pullStats(
+            job["ident"], job["doi"], padArray
+        )
+        return {
+            "wos": noPad,
+            "wosPad": pad,
+            "citePubStartEndYr": [pubYr, citeStartYr, citeEndYr],
+        }
+    try:
+        gcites = grabGoogleScholarCites(job["ident"], raiseErrors=True)
+    except SerpApiError as e:
+        if e.quota:
+            # allocation exceeded - leave for a worker with quota left
+            raise AllocationExceeded(str(e)) from e
+        # bad cluster id etc - retried then failed via failJob
+        raise
+
+    return {"gsch": gcites}
+
+
+def runWorker(
+    dbPath,
+    owner=None,
+    kinds=("wos", "gsch"),
+    leaseSecs=600,
+    maxAttempts=5,
+    sleep=0.0,
+    maxJobs=None,
+) -> int:
+    """
+    Lease and run jobs until the queue is drained (or maxJobs), sleep
+    seconds between jobs to stay under per-key rate limits. Once the
+    worker's SerpAPI allocation is exceeded it stops leasing gsch jobs.
+    Returns the number of jobs completed by this worker
+    """
+    if owner is None:
+        owner = "-".join([socket.gethostname(), str(os.getpid())])
+    conn = openQueue(dbPath)
+    padLen = conn.execute("SELECT value FROM meta WHERE name = 'padLen'").fetchone()
+    padArray = [math.nan] * int(padLen[0])
+    kinds = list(kinds)
+    done = 0
+    while maxJobs is None or done < maxJobs:
+        job = leaseJob(conn, owner, leaseSecs, maxAttempts, kinds)
+        if job is None:
+            break
+        print("Leased:", owner, job["kind"], job["key"], "attempt", job["attempts"] + 1)
+        try:
+            result = runJob(job, padArray)
+        except AllocationExceeded as e:
+            print("Released:", job["kind"], job["key"], e)
+            releaseJob(conn, job["id"], owner, str(e))
+            kinds.remove(job["kind"])
+            if not kinds:
+                break
+        except Exception as e:
+            print("Failed:", job["kind"], job["key"], e)
+            failJob(conn, job["id"], owner, e, maxAttempts)
+        else:
+            if completeJob(conn, job["id"], owner, result):
+                done = done + 1
+        if sleep:
+            time.sleep(sleep)
+    conn.close()
+
+    return done
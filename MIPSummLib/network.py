@@ -0,0 +1,411 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import collections
+import concurrent.futures
+import functools
+import logging
+import threading
+
+import requests
+
+from . import normDoi, normWosId
+
+# %% notes
+"""
+Created on Mon Oct 19 10:02:41 2026
+
+MIPSummLib network functions - WoS Expanded API and SerpAPI
+(Google Scholar) queries, requires requests
+
+PJD 19 Oct 2026 - split out of MIPSummLib
+PJD 19 Oct 2026 - shared keep-alive session, short record (SR) view for
+                  pullStats, single json parse per response, lazy debug logging
+PJD 19 Oct 2026 - add singleFlight; identical in-flight WoS/GS lookups share one
+                  call, completed results kept in a bounded in-process LRU
+PJD 19 Oct 2026 - one keep-alive session per thread (getSession)
+PJD 19 Oct 2026 - numeric (numpy) imported in pullStats, not at module import
+PJD 19 Oct 2026 - grabGoogleScholarCites raiseErrors, SerpApiError separates
+                  allocation exceeded from per query errors
+
+@author: durack1
+"""
+
+
+# %% API endpoints
+
+# API Expanded
+WOS_API_URL = "https://wos-api.clarivate.com/api/wos"
+# https://api.clarivate.com/swagger-ui/?apikey=none&url=https%3A%2F%2Fdeveloper.clarivate.com%2Fapis%2Fwos%2Fswagger
+# Starter API
+WoSStarter_API_URL = "https://api.clarivate.com/apis/wos-starter/v1"
+# https://api.clarivate.com/swagger-ui/?apikey=none&url=https%3A%2F%2Fdeveloper.clarivate.com%2Fapis%2Fwos-starter%2Fswagger
+
+
+# keep-alive connection reuse, one requests.Session per thread (sessions
+# are not documented as thread-safe, see getSession)
+sessionLocal = threading.local()
+# pullStats only needs the first record summary (pub_info, names)
+recordSummaryParams = {"count": 1, "firstRecord": 1, "optionView": "SR"}
+# local API key stores, harvest workers point these at their own keys
+keyFiles = {"wos": "WoSKey.txt", "gsch": "SerpKey.txt"}
+# SerpAPI error texts for an exhausted key allocation, others are per query
+serpQuotaErrors = ["run out of searches", "throughput limit"]
+
+
+# %% class defs
+
+
+class SerpApiError(Exception):
+    """
+    SerpAPI returned an error rather than results, quota is True for an
+    exhausted key allocation (see serpQuotaErrors)
+    """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.quota = any(x in message.lower() for x in serpQuotaErrors)
+
+
+# %% single-flight lookup cache
+
+
+def singleFlight(maxsize=256, cacheNone=False):
+    """
+    Decorator - identical concurrent calls share one underlying call and
+    completed results are kept in a bounded LRU (per process). Errors are
+    passed to all waiting callers and are not cached, nor are None results
+    unless cacheNone. Cached results are shared, don't modify them
+    """
+
+    def decorator(func):
+        lock = threading.Lock()
+        inFlight = {}
+        cache = collections.OrderedDict()
+        stats = {"hits": 0, "misses": 0, "shared": 0}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    return cache[key]
+                fut = inFlight.get(key)
+                leader = fut is None
+                if leader:
+                    fut = concurrent.futures.Future()
+                    inFlight[key] = fut
+                    stats["misses"] += 1
+                else:
+                    stats["shared"] += 1
+            if not leader:
+                return fut.result()
+
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                with lock:
+                    del inFlight[key]
+                fut.set_exception(e)
+                raise
+            with lock:
+                del inFlight[key]
+                if result is not None or cacheNone:
+                    cache[key] = result
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            fut.set_result(result)
+
+            return result
+
+        def cacheClear():
+            with lock:
+                cache.clear()
+
+        def cacheInfo():
+            with lock:
+                return dict(stats, size=len(cache), maxsize=maxsize)
+
+        wrapper.cacheClear = cacheClear
+        wrapper.cacheInfo = cacheInfo
+
+        return wrapper
+
+    return decorator
+
+
+# %% function defs
+
+
+def apiKeyW():
+    """
+    Read WoS API key from local store
+    """
+    with open(keyFiles["wos"], "r") as f:
+        tmp = f.read()
+        key = tmp.split()[-1]
+
+    return key
+
+
+def apiKeyG():
+    """
+    Read SerpAPI key from local store
+    """
+    with open(keyFiles["gsch"], "r") as f:
+        tmp = f.read()
+        key = tmp.split()[-1]
+
+    return key
+
+
+def getSession():
+    """
+    Keep-alive requests.Session for the calling thread, created on first use
+    """
+    session = getattr(sessionLocal, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({"Accept": "application/json"})
+        sessionLocal.session = session
+
+    return session
+
+
+def grabCitationReport(queryId, params={}):
+    """
+    Use queryId to grab json output - every query counts as 1 against quota
+    """
+    headers = {"X-ApiKey": apiKeyW()}
+    r = getSession().get(
+        WOS_API_URL + "/citation-report/" + str(queryId),
+        params=params,
+        headers=headers,
+        timeout=10,
+    )
+    try:
+        rj = r.json()
+        logging.debug("API response: %s", rj)
+        return rj
+    except Exception:
+        logging.exception("Citation report for queryId {} failed".format(queryId))
+        raise
+
+
+@singleFlight()
+def grabGoogleScholarCites(doi, raiseErrors=False):
+    """
+    User SerpAPI to scour citation counts from Google Scholar, SerpAPI errors
+    (allocation exceeded, bad cluster id, ...) return None, or raise
+    SerpApiError with the error text if raiseErrors
+    """
+    # params = {"api_key": apiKeyG(), "engine": "google_scholar", "q": doi, "hl": "en"}
+    params = {
+        "api_key": apiKeyG(),
+        "engine": "google_scholar",
+        "cluster": doi,
+        "hl": "en",
+    }
+    queryUrl = "https://serpapi.com/search.json?"
+    r = getSession().get(queryUrl, params=params, timeout=10)
+
+    rj = r.json()  # parse once
+    logging.debug("SerpAPI response: %s", rj)
+
+    # catch case of allocation time out, or no results for doi
+    pubYr = ""
+    if "organic_results" not in rj.keys():
+        error = rj.get("error", "no organic_results returned")
+        print("Processing GS: SerpAPI error:", error)
+        if raiseErrors:
+            raise SerpApiError(error)
+        googleScholCites = None
+    else:
+        try:
+            googleScholCites = rj["organic_results"][0]["inline_links"]["cited_by"][
+                "total"
+            ]
+            if "authors" in rj["organic_results"][0]["publication_info"].keys():
+                authorCount = len(
+                    rj["organic_results"][0]["publication_info"]["authors"]
+                )
+                firstAuthorLastName = rj["organic_results"][0]["publication_info"][
+                    "authors"
+                ][0]["name"]
+            # catch issue with ar2/gates - researchgate.net author
+            elif (
+                rj["organic_results"][0]["publication_info"]["summary"]
+                == "researchgate.net"
+            ):
+                authorCount = 0
+                firstAuthorLastName = "researchgate.net"
+            else:
+                authorCount = 0
+                firstAuthorLastName = (
+                    rj["organic_results"][0]["publication_info"]["summary"]
+                    .split("-")[0]
+                    .strip()
+                )
+            if authorCount > 1:
+                etal = "et al."
+            else:
+                etal = ""
+
+            if pubYr != "":
+                pubYr = (
+                    rj["organic_results"][0]["publication_info"]["summary"]
+                    .split("-")[1]
+                    .split(",")[-1]
+                    .strip()
+                )
+            print("Processing GS:", firstAuthorLastName, etal, pubYr, googleScholCites)
+        except Exception:
+            logging.exception(doi)
+            raise
+
+    return googleScholCites
+
+
+def grabQueryId(query, params={}):
+    """
+    Send API dummy call - ping to get query ID, start connection
+    """
+    query = {"databaseId": "WOS", "usrQuery": query, "count": 0, "firstRecord": 1}
+    query.update(params)
+    headers = {"X-ApiKey": apiKeyW()}
+    # logging.info('Query parameters: {}'.format(query))
+    # print(query)
+    r = getSession().get(WOS_API_URL, params=query, headers=headers, timeout=10)
+    try:
+        # print(r.text)
+        rj = r.json()
+        # print(rj)
+        logging.debug("API response: %s", rj)
+        queryId = rj["QueryResult"]["QueryID"]
+        return queryId
+    except Exception:
+        logging.exception(query)
+        raise
+
+
+def grabQueryReport(queryId, params={}):
+    """
+    Use queryId to grab json output - every query counts as 1 against quota
+    """
+    headers = {"X-ApiKey": apiKeyW()}
+    r = getSession().get(
+        WOS_API_URL + "/query/" + str(queryId),
+        params=params,
+        headers=headers,
+        timeout=10,
+    )
+    try:
+        rj = r.json()
+        logging.debug("API response: %s", rj)
+        return rj
+    except Exception:
+        logging.exception("Citation report for queryId {} failed".format(queryId))
+        raise
+
+
+def grabRecordSummary(queryId):
+    """
+    Fetch only the first record of queryId as a short record (SR) view and
+    keep just the pullStats fields - pubYr, author count and first author
+    """
+    query = grabQueryReport(queryId, recordSummaryParams)
+    summary = query["Records"]["records"]["REC"][0]["static_data"]["summary"]
+    names = summary["names"]
+    name = names["name"][0] if names["count"] > 1 else names["name"]
+    del query
+
+    return {
+        "pubYr": summary["pub_info"]["pubyear"],
+        "authorCount": names["count"],
+        "firstAuthorLastName": name["last_name"],
+    }
+
+
+@singleFlight()
+def grabWosCitations(wosId):
+    """
+    Network half of pullStats - query UT, return (record summary, citation
+    report entry), identical lookups are coalesced and cached
+    """
+    # construct per call arguments and send to API
+    params = "UT={}".format(wosId)
+    queryId = grabQueryId(params)
+    # query - short record, first record only
+    summary = grabRecordSummary(queryId)
+
+    # citation-report
+    crParams = {"reportLevel": "WOS"}
+    crData = grabCitationReport(queryId, crParams)
+
+    return summary, crData[0]
+
+
+def harvestPublications(
+    registry, padArray, group=None, dataDic=None, wosStats=None, gsch=True
+):
+    """
+    Iterate registry records and fill dataDic with WoS and Google Scholar
+    citation info - records without a WoSId only get gsch counts. WoS stats
+    found in wosStats (see loadWosExports) are used instead of the API, with
+    gsch=False existing gsch values are kept rather than re-queried
+    """
+    if dataDic is None:
+        dataDic = {}
+    if wosStats is None:
+        wosStats = {}
+    recs = registry if group is None else registry.group(group)
+    for count, rec in enumerate(recs):
+        print(count, rec.key)
+        oldGsch = dataDic.get(rec.key, {}).get("gsch")
+        dataDic[rec.key] = {}
+        if rec.wosId:
+            # process WoS requests, export file stats first
+            stats = wosStats.get(normWosId(rec.wosId))
+            if stats is None and rec.doi:
+                stats = wosStats.get(normDoi(rec.doi))
+            if stats is None:
+                stats = pullStats(rec.wosId, rec.doi, padArray)
+            pubYr, _, noPad, pad, _, citeStartYr, citeEndYr = stats
+            dataDic[rec.key]["wos"] = noPad
+            dataDic[rec.key]["wosPad"] = pad
+            dataDic[rec.key]["citePubStartEndYr"] = [pubYr, citeStartYr, citeEndYr]
+        else:
+            dataDic[rec.key]["wos"] = []
+            dataDic[rec.key]["wosPad"] = []
+        if gsch:
+            dataDic[rec.key]["gsch"] = grabGoogleScholarCites(rec.gschId)
+        else:
+            dataDic[rec.key]["gsch"] = oldGsch
+
+    return dataDic
+
+
+def pullStats(wosId, doi, padArray):
+    """
+    From WoS Expanded API DOI object extract time history of citations
+    along with total citation count and pubYr
+    """
+    # numpy on first use only, gsch-only workers never need it
+    from .numeric import buildCiteStats
+
+    summary, citeDict = grabWosCitations(normWosId(wosId))
+
+    pubYr = summary["pubYr"]
+    authorCount = summary["authorCount"]  # Author count
+    firstAuthorLastName = summary["firstAuthorLastName"]
+    if authorCount > 1:
+        etal = "et al."
+    else:
+        etal = ""
+    print("Processing WoS:", firstAuthorLastName, etal, pubYr)
+
+    return buildCiteStats(citeDict, pubYr, padArray)
@@ -0,0 +1,574 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import copy
+import csv
+import datetime
+import glob
+import json
+import logging
+import os
+
+import numpy as np
+
+from . import (
+    convertToFloat,
+    footprintDateList,
+    normDoi,
+    normWosId,
+    readWosCitationReport,
+    readWosRecords,
+    wosExportType,
+)
+
+# %% notes
+"""
+Created on Mon Oct 19 10:02:41 2026
+
+MIPSummLib numeric functions - citation padding, WoS export
+statistics and ESGF footprint loading/statistics, requires numpy
+
+PJD 19 Oct 2026 - split out of MIPSummLib
+PJD 19 Oct 2026 - FootprintCube empty date ranges outside the cube
+PJD 19 Oct 2026 - FootprintCube.topK rejects unknown by, buildFootprintCube
+                  errors on CSVs with no rows
+PJD 19 Oct 2026 - rollingMean all NaN for series shorter than window
+PJD 19 Oct 2026 - RollingFootprintStats.rollingMean NaN until window filled
+PJD 19 Oct 2026 - loadWosExports prefers citation report PY/TC
+
+@author: durack1
+"""
+
+
+# %% class defs
+
+
+class FootprintCube:
+    """
+    Chunked, memory-mapped (days x experiment_id x source_id) footprint
+    cube on the footprintDateList date axis. Aggregations stream through
+    chunkDays days at a time so peak memory is bounded by chunk size
+    """
+
+    __slots__ = ("cubePath", "meta", "data", "dateList", "experiments", "sources")
+
+    def __init__(self, cubePath, mode="r"):
+        self.cubePath = cubePath
+        with open(os.path.join(cubePath, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.dateList = footprintDateList(
+            datetime.date.fromordinal(self.meta["endOrdinal"]),
+            datetime.date.fromordinal(self.meta["startOrdinal"]),
+        )
+        self.experiments = self.meta["experiments"]
+        self.sources = self.meta["sources"]
+        self.data = np.memmap(
+            os.path.join(cubePath, "cube.dat"),
+            dtype=self.meta["dtype"],
+            mode=mode,
+            shape=(len(self.dateList), len(self.experiments), len(self.sources)),
+        )
+
+    def chunks(self, start=None, end=None):
+        """
+        Iterate (dayInd, chunk) over the date range, chunk is a memmap view
+        """
+        startInd, endInd = self.dateInds(start, end)
+        chunkDays = self.meta["chunkDays"]
+        for dayInd in range(startInd, endInd, chunkDays):
+            yield dayInd, self.data[dayInd : min(dayInd + chunkDays, endInd)]
+
+    def dateInds(self, start=None, end=None):
+        """
+        Map inclusive start/end dates (datetime.date) to day indices, clipped
+        to the cube - ranges outside the cube or with start after end are
+        empty (startInd == endInd)
+        """
+        startOrdinal = self.meta["startOrdinal"]
+        dayCount = len(self.dateList)
+        startInd = 0 if start is None else start.toordinal() - startOrdinal
+        endInd = dayCount if end is None else end.toordinal() - startOrdinal + 1
+        startInd = min(max(startInd, 0), dayCount)
+        endInd = max(min(endInd, dayCount), startInd)
+
+        return startInd, endInd
+
+    def fillForward(self):
+        """
+        Carry cumulative values forward over days with no record (NaN),
+        as readFootprintCsvs does, one chunk at a time
+        """
+        last = np.zeros(self.data.shape[1:])
+        for _, chunk in self.chunks():
+            for day in chunk:
+                np.copyto(day, last, where=np.isnan(day))
+                last = day.copy()
+        self.data.flush()
+
+    def sum(self, axis=(1, 2), start=None, end=None):
+        """
+        Sum over axes (0 days, 1 experiment_id, 2 source_id) within the
+        date range, streaming chunk-wise. An empty range gives zeros, or
+        no rows when days are kept
+        """
+        axis = (axis,) if isinstance(axis, int) else tuple(axis)
+        startInd, endInd = self.dateInds(start, end)
+        if startInd == endInd:
+            return np.asarray(self.data[startInd:endInd], dtype=float).sum(axis=axis)
+        out = []
+        total = None
+        for _, chunk in self.chunks(start, end):
+            tmp = np.asarray(chunk).sum(axis=axis)
+            if 0 in axis:
+                total = tmp if total is None else total + tmp
+            else:
+                out.append(tmp)
+        if 0 in axis:
+            return total
+
+        return np.concatenate(out, axis=0)
+
+    def topK(self, k, by="sources", start=None, end=None):
+        """
+        Top k experiments or sources by footprint added over the date range,
+        values are cumulative so only the range end points are read. An
+        empty date range returns []
+        """
+        if by not in ["experiments", "sources"]:
+            raise ValueError("Unknown by: {}".format(by))
+        startInd, endInd = self.dateInds(start, end)
+        if startInd == endInd:
+            return []
+        added = np.array(self.data[endInd - 1], dtype=float)
+        if startInd > 0:
+            added = added - self.data[startInd - 1]
+        axis = 0 if by == "sources" else 1
+        names = self.sources if by == "sources" else self.experiments
+        totals = added.sum(axis=axis)
+        order = np.argsort(totals)[::-1][:k]
+
+        return [(names[i], float(totals[i])) for i in order]
+
+
+class RollingFootprintStats:
+    """
+    Incremental footprint statistics for the readFootprintCsvs arr2 layout,
+    each appended daily row updates the rolling window and current
+    week/month ingest in O(1) per column rather than recomputing history
+    """
+
+    __slots__ = (
+        "window",
+        "filled",
+        "lastOrdinal",
+        "lastRow",
+        "ring",
+        "ringInd",
+        "ringSum",
+        "weekStart",
+        "weekIngest",
+        "monthKey",
+        "monthIngest",
+    )
+
+    def __init__(self, arr2, window=30, weekStart=None):
+        """
+        Prime from existing history - weekStart ordinal aligns weekly bins,
+        defaults to the first day in arr2 as with footprintIngest
+        """
+        if window < 1:
+            raise ValueError("window must be >= 1: {}".format(window))
+        daily = footprintIngest(arr2)[1]
+        self.window = window
+        self.lastOrdinal = int(arr2[-1, 0])
+        self.lastRow = arr2[-1, 1:].copy()
+        self.ring = np.zeros([window, daily.shape[1]])
+        tail = daily[-window:]
+        self.ring[: len(tail)] = tail
+        self.ringInd = len(tail) % window
+        self.filled = len(tail)
+        self.ringSum = self.ring.sum(axis=0)
+        if weekStart is None:
+            weekStart = int(arr2[0, 0])
+        weekInd = (self.lastOrdinal - weekStart) // 7
+        self.weekStart = weekStart + weekInd * 7
+        self.weekIngest = daily[arr2[:, 0] >= self.weekStart].sum(axis=0)
+        lastDate = datetime.date.fromordinal(self.lastOrdinal)
+        self.monthKey = (lastDate.year, lastDate.month)
+        monthStart = datetime.date(lastDate.year, lastDate.month, 1).toordinal()
+        self.monthIngest = daily[arr2[:, 0] >= monthStart].sum(axis=0)
+
+    def append(self, ordinal, row):
+        """
+        Add a new cumulative row (excluding the date column), missing days
+        in between carry the previous value forward (zero ingest)
+        """
+        row = np.asarray(row, dtype=float)
+        if ordinal <= self.lastOrdinal:
+            raise ValueError("Rows must be appended in date order")
+        for gapOrdinal in range(self.lastOrdinal + 1, ordinal):
+            self.push(gapOrdinal, np.zeros_like(self.lastRow))
+        self.push(ordinal, row - self.lastRow)
+        self.lastRow = row
+
+    def push(self, ordinal, ingest):
+        """
+        Update window and period accumulators with one day of ingest
+        """
+        self.ringSum += ingest - self.ring[self.ringInd]
+        self.ring[self.ringInd] = ingest
+        self.ringInd = (self.ringInd + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+        if ordinal - self.weekStart >= 7:
+            self.weekStart += (ordinal - self.weekStart) // 7 * 7
+            self.weekIngest = np.zeros_like(ingest)
+        self.weekIngest = self.weekIngest + ingest
+        date = datetime.date.fromordinal(ordinal)
+        if (date.year, date.month) != self.monthKey:
+            self.monthKey = (date.year, date.month)
+            self.monthIngest = np.zeros_like(ingest)
+        self.monthIngest = self.monthIngest + ingest
+        self.lastOrdinal = ordinal
+
+    def rollingMean(self):
+        """
+        Mean daily ingest over the last window days, NaN until window days
+        are held (as the vectorised rollingMean)
+        """
+        if self.filled < self.window:
+            return np.full(self.ringSum.shape, np.nan)
+
+        return self.ringSum / self.window
+
+    def shares(self):
+        """
+        Current per-activity percentage share of the summed activities
+        """
+        return activityShares(self.lastRow[np.newaxis, :], dateCol=False)[0]
+
+
+# %% function defs
+
+
+def activityShares(arr2, q=None, dateCol=True):
+    """
+    Per-activity percentage share of summed activity footprints for each
+    day (columns 2: of arr2, or 1: with dateCol=False when there is no date
+    column), with q return the percentiles over time
+    """
+    acts = arr2[:, 2:] if dateCol else arr2[:, 1:]
+    total = acts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(total > 0, acts / total * 100, np.nan)
+    if q is not None:
+        return np.nanpercentile(shares, q, axis=0)
+
+    return shares
+
+
+def buildCiteStats(citeDict, pubYr, padArray):
+    """
+    Take a citation report entry (CitingYears, TimesCited) and pubYr, return
+    the pullStats tuple - shared by API and WoS export file ingest
+    """
+    # padArray copy.deepcopy() NaN length array
+    citingCountsCompletePad = copy.deepcopy(padArray)
+    del padArray
+
+    # pass info to padCiteCounts providing a time complete entry to currentYr-1
+    citingYrs, citingCounts, citingYrsComplete, citeCountsComplete = padCiteCounts(
+        citeDict, pubYr
+    )
+    indEnd = len(citingYrsComplete)  # stop prior to currentYr, index in zero space
+    citingCountsCompletePad[0:indEnd] = citeCountsComplete
+
+    citingYrsDict = citeDict["CitingYears"]
+    timesCited = citeDict["TimesCited"]
+    citeStartYr = citingYrs[0]
+    citeEndYr = citingYrs[-1]
+
+    # explicitly convert int64 to int16 - json.dump can't write it
+    citingYrs = convertToFloat(citingYrs)
+    citingCountsCompletePad = convertToFloat(citingCountsCompletePad)
+
+    return (
+        pubYr,
+        timesCited,
+        citingYrs,
+        citingCountsCompletePad,
+        citingYrsDict,
+        citeStartYr,
+        citeEndYr,
+    )
+
+
+def buildFootprintCube(
+    cubePath,
+    csvFiles,
+    chunkDays=32,
+    cols=("date", "experiment_id", "source_id", "data_footprint"),
+):
+    """
+    Build a FootprintCube from long format cumulative footprint CSVs (date,
+    experiment_id, source_id, bytes). CSVs are streamed twice - once for the
+    axes, once to write values into the memmap - then filled forward
+    """
+    if isinstance(csvFiles, str):
+        csvFiles = [csvFiles]
+
+    def readRows():
+        for csvFile in csvFiles:
+            with open(csvFile, newline="") as f:
+                for row in csv.DictReader(f):
+                    date = datetime.date.fromisoformat(row[cols[0]].split(" ")[0])
+                    yield date, row[cols[1]], row[cols[2]], row[cols[3]]
+
+    # pass 1 - axes
+    experiments, sources, endTime = set(), set(), None
+    for date, expId, srcId, _ in readRows():
+        experiments.add(expId)
+        sources.add(srcId)
+        if endTime is None or date > endTime:
+            endTime = date
+    if endTime is None:
+        raise ValueError("No footprint rows found in {}".format(csvFiles))
+    # footprintDateList end is exclusive, keep the last recorded day
+    endTime = endTime + datetime.timedelta(days=1)
+    dateList = footprintDateList(endTime)
+    os.makedirs(cubePath, exist_ok=True)
+    meta = {
+        "startOrdinal": dateList[0].toordinal(),
+        "endOrdinal": endTime.toordinal(),
+        "experiments": sorted(experiments),
+        "sources": sorted(sources),
+        "chunkDays": chunkDays,
+        "dtype": "float64",
+    }
+    with open(os.path.join(cubePath, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=4)
+    data = np.memmap(
+        os.path.join(cubePath, "cube.dat"),
+        dtype=meta["dtype"],
+        mode="w+",
+        shape=(len(dateList), len(experiments), len(sources)),
+    )
+    data[:] = np.nan
+    data.flush()
+    del data
+
+    # pass 2 - values
+    cube = FootprintCube(cubePath, mode="r+")
+    expInds = {x: c for c, x in enumerate(cube.experiments)}
+    srcInds = {x: c for c, x in enumerate(cube.sources)}
+    for date, expId, srcId, val in readRows():
+        dayInd = date.toordinal() - meta["startOrdinal"]
+        if 0 <= dayInd < len(dateList):
+            cube.data[dayInd, expInds[expId], srcInds[srcId]] = val
+    cube.fillForward()
+
+    return cube
+
+
+def footprintIngest(arr2, period="daily"):
+    """
+    Convert cumulative arr2 footprints to ingest per period ("daily",
+    "weekly" - 7 day bins from the first day, or "monthly" - calendar),
+    returns (period start ordinals, ingest[periods, columns 1:])
+    """
+    ordinals = arr2[:, 0].astype(int)
+    daily = np.diff(arr2[:, 1:], axis=0, prepend=arr2[:1, 1:])
+    if period == "daily":
+        return ordinals, daily
+    elif period == "weekly":
+        startInds = np.arange(0, len(ordinals), 7)
+    elif period == "monthly":
+        months = np.array(
+            [(d.year * 12 + d.month) for d in map(datetime.date.fromordinal, ordinals)]
+        )
+        startInds = np.flatnonzero(np.diff(months, prepend=months[0] - 1))
+    else:
+        raise ValueError("Unknown period: {}".format(period))
+
+    return ordinals[startInds], np.add.reduceat(daily, startInds, axis=0)
+
+
+def loadWosExports(filePaths, padArray):
+    """
+    Bulk offline ingest of WoS export files - citation report exports give
+    the per-year citation history and times cited, savedrecs exports only
+    fill in missing pubYr and times cited, whatever the file order. Returns
+    {UT: pullStats tuple}, rows without a UT are keyed by normalised DOI
+    """
+    if isinstance(filePaths, str):
+        filePaths = [filePaths]
+    # key: {"citationReport"|"records": {PY, TC, CitingYears}}, non-empty only
+    exports = {}
+    for filePath in filePaths:
+        exportType = wosExportType(filePath)
+        if exportType == "citationReport":
+            rows = readWosCitationReport(filePath)
+        else:
+            rows = readWosRecords(filePath)
+        for row in rows:
+            key = normWosId(row["UT"]) if row["UT"] else normDoi(row["DOI"])
+            if not key:
+                continue
+            vals = exports.setdefault(key, {}).setdefault(exportType, {})
+            for kw in ["PY", "TC", "CitingYears"]:
+                if row.get(kw) not in (None, {}):
+                    vals[kw] = row[kw]
+
+    recs = {}
+    for key, export in exports.items():
+        report = export.get("citationReport", {})
+        records = export.get("records", {})
+        recs[key] = {
+            "PY": report.get("PY", records.get("PY")),
+            "TC": report.get("TC", records.get("TC")),
+            "CitingYears": report.get("CitingYears", {}),
+        }
+
+    wosStats = {}
+    for key, rec in recs.items():
+        if not rec["CitingYears"] or rec["PY"] is None:
+            logging.warning("No citation history for {}, skipping".format(key))
+            continue
+        citeDict = {"CitingYears": rec["CitingYears"], "TimesCited": rec["TC"]}
+        if citeDict["TimesCited"] is None:
+            citeDict["TimesCited"] = sum(rec["CitingYears"].values())
+        wosStats[key] = buildCiteStats(citeDict, rec["PY"], padArray)
+
+    return wosStats
+
+
+def openFootprintCube(cubePath, mode="r"):
+    """
+    Open an existing FootprintCube, see buildFootprintCube
+    """
+    return FootprintCube(cubePath, mode)
+
+
+def padCiteCounts(citeDict, pubYr):
+    """
+    Take WoS citation year:count, sum earlier citations to pubYr, fill missing
+    years and expand to current year, even if not citations to fill
+    """
+    currentYr = datetime.date.today().year
+    # targetYr = currentYr - 1
+    # print("currentYr:", currentYr, "targetYr:", targetYr)
+
+    # ascertain cite start year build list
+    citingYrs = list(map(int, citeDict["CitingYears"].keys()))
+    citingCounts = list(map(int, citeDict["CitingYears"].values()))
+    citeStartYr = citingYrs[0]
+    # print("citingYrs:", citingYrs)
+    # print("citingCounts:", citingCounts)
+
+    # if citeStartYr < pubYr sum first entries
+    startInd = citeStartYr - pubYr  # 0 if cited same year published
+    startIndAbs = abs(startInd)
+    # print("startInd:", startInd)
+    if startInd < 0:  # cfmip, omip2 = -1; = 0; ar1 = 1; dynvarmip = 2
+        print("**case citeStartYr < pubYr")
+        # sum entries before publication yr into pubYr
+        tmp = copy.deepcopy(citingCounts)
+        # print("citingCounts:", citingCounts)
+        # print("tmp:       ", tmp)
+        newInd = abs(startInd) + 1
+        tmp1 = [np.sum(tmp[:newInd])]
+        tmp1.extend(citingCounts[newInd:])
+        # print("tmp1.ext:", tmp1)
+        citingCounts = tmp1  # list(map(int, tmp1))
+        citingYrs = citingYrs[startIndAbs:]
+        del (tmp, tmp1)
+
+    # preallocate target - ar1 has holes
+    citingYrsComplete = np.arange(pubYr, currentYr + 1, dtype="int16").tolist()
+    citingCountsComplete = np.zeros(len(citingYrsComplete), dtype="int16").tolist()
+
+    # iterate and fill - ignoring current year
+    for count, yr in enumerate(citingYrs):
+        # report currentYr partial counts
+        if yr == currentYr:  # fangio, cmip3, ar4, cmip5, cmip6, 250124
+            print("Current year:", currentYr, "total citations:", citingCounts[count])
+        ind = citingYrsComplete.index(yr)
+        citingCountsComplete[ind] = citingCounts[count]
+
+    # print("citingYrsComplete:", len(citingYrsComplete), citingYrsComplete)
+    # print("citingCountsComplete:", len(citingCountsComplete), citingCountsComplete)
+
+    return citingYrs, citingCounts, citingYrsComplete, citingCountsComplete
+
+
+def readFootprintCsvs(csvPath, offsetInds=[0, 8, 19]):
+    """
+    Read ESGF cumulative data_footprint CSVs into the notebook arr2 layout,
+    column 0 date ordinals, 1 CMIP6 total then activities. offsetInds skip a
+    column for activities without a CSV (8 DynVarMIP, 20 SIMIP); days
+    missing from a CSV carry the previous value forward
+    """
+    csvFiles = glob.glob(os.path.join(csvPath, "*_datasets_*_footprint_CMIP6_*.csv"))
+    csvFiles.sort()
+
+    # create dictionary
+    files = {}
+    for count, actId in enumerate(csvFiles):
+        actIdSplit = actId.split("_")
+        dates = actIdSplit[-1].split("-")[-1].split(".")[0]
+        year = int(dates[0:4])
+        month = int(dates[4:6])
+        day = int(dates[-2:])
+        files[actIdSplit[-2]] = actId
+
+    actCount = len(files) + len(offsetInds) - 1
+
+    endTime = datetime.date(int(year), int(month), int(day))
+    dateList = footprintDateList(endTime)
+    dateCount = len(dateList)
+
+    # create numpy array
+    arr2 = np.zeros([dateCount, actCount + 1])
+    arr2[:, 0] = [x.toordinal() for x in dateList]
+
+    # read CSV
+    offset = 0  # initialize variable
+    for count, actId in enumerate(files):
+        tmpCount = {}
+        with open(files[actId]) as csvfile:
+            for row in csv.reader(csvfile, delimiter=","):
+                if row[0] == "date":
+                    continue
+                year, month, day = row[0].split("-")
+                day = day.split(" ")[0]
+                tmpCount[datetime.date(int(year), int(month), int(day))] = row[1]
+
+        if count in offsetInds:
+            offset = offset + 1
+        col = count + offset
+        for dateMatch, x in enumerate(dateList):
+            if x in tmpCount:
+                arr2[dateMatch, col] = tmpCount[x]
+            else:
+                arr2[dateMatch, col] = arr2[dateMatch - 1, col]
+
+    return files, dateList, arr2
+
+
+def rollingMean(x, window):
+    """
+    Vectorised rolling mean along axis 0 via cumulative sums, the first
+    window-1 rows are NaN (all rows when the series is shorter than window)
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1: {}".format(window))
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if window > len(x):
+        return out
+    csum = np.cumsum(x, axis=0)
+    out[window - 1] = csum[window - 1] / window
+    out[window:] = (csum[window:] - csum[:-window]) / window
+
+    return out
@@ -0,0 +1,31 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+# %% imports
+
+import numpy as np
+
+# %% notes
+"""
+Created on Mon Oct 19 10:02:41 2026
+
+MIPSummLib plotting helpers, requires numpy
+
+PJD 19 Oct 2026 - split out of MIPSummLib
+
+@author: durack1
+"""
+
+
+# %% function defs
+
+
+def updateLineColours(ax, cm):
+    """
+    For line plot, take provided colourmap and recolour lines
+    https://stackoverflow.com/questions/20040597/matplotlib-change-colormap-after-the-fact
+    """
+    lines = ax.lines
+    colours = cm(np.linspace(0, 1, len(lines)))
+    for line, c in zip(lines, colours):
+        line.set_color(c)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:31:12 2026
+
+Import-time benchmark for MIPSummLib - each import is timed in a fresh
+interpreter, as a spawned worker process would pay it
+
+e.g. python benchImport.py --repeat 20
+
+PJD 19 Oct 2026     - Started
+PJD 19 Oct 2026     - Added gsch worker (grabGoogleScholarCites only) row
+
+@author: durack1
+"""
+
+# %% imports
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# %% define imports to time
+imports = {
+    "python (baseline)": "pass",
+    "MIPSummLib core": "import MIPSummLib",
+    "MIPSummLib.numeric": "import MIPSummLib.numeric",
+    "MIPSummLib.network": "import MIPSummLib.network",
+    "MIPSummLib.plotting": "import MIPSummLib.plotting",
+    "gsch worker imports": "from MIPSummLib import grabGoogleScholarCites",
+    "notebook imports": "from MIPSummLib import grabGoogleScholarCites, pullStats, updateLineColours",
+}
+
+# %% function defs
+
+
+def timeImport(stmt, repeat=10) -> list:
+    """
+    Wall time (ms) for a fresh interpreter to run stmt, repeat times
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", stmt], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return times
+
+
+# %% run benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MIPSummLib import benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = None
+    for label, stmt in imports.items():
+        times = timeImport(stmt, args.repeat)
+        median = statistics.median(times)
+        if baseline is None:
+            baseline = median
+        print(
+            "{:22} median {:7.1f} ms  (+{:6.1f} ms over baseline)".format(
+                label, median, median - baseline
+            )
+        )
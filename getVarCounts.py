@@ -16,31 +16,278 @@ PJD 13 Nov 2024     - Augmented cmipCoords with more CMIP5-era coords to
 PJD 14 Nov 2024     - Augmented for all existing CMOR tables
                     TODO: Determine variables written to CMIP3,
                      5 and 6 ESGF archives
+PJD 19 Oct 2026     - Added reportMipHistory, --history mode walks tags/commits
+                      of a local cmor-tables repo reading git blobs directly,
+                      blob parses cached by hash; wrapped script in __main__
+PJD 19 Oct 2026     - Added --diff, per-variable attribute fingerprints
+                      (units, dimensions, cell_methods, frequency) and
+                      linear time table set diffs
+PJD 19 Oct 2026     - reportMipHistory bounds blobs in flight to the pool
 
 @author: durack1
 """
 
 # %% imports
+import argparse
+import concurrent.futures
+import csv
 import datetime
 import glob
 import hashlib
+import io
 import json
+import multiprocessing
 import os
+import subprocess
+
+# %% define table constants
+# coordinate variables excluded from variable counts
+cmipCoords = [
+    "a",
+    "a_bnds",
+    "ap",
+    "ap_bnds",
+    "az",
+    "az_bnds",
+    "b",
+    "b_bnds",
+    "bz",
+    "bz_bnds",
+    "depth",
+    "depth_c",
+    "eta",
+    "href",
+    "k_c",
+    "nsigma",
+    "p0",
+    "ptop",
+    "sigma",
+    "sigma_bnds",
+    "z1",
+    "z2",
+    # "zfull",  # fixed field CMIP6_fx.json
+    # "zhalf", # fixed field CMIP6_CF3hr.json
+    "zlev",
+    "zlev_bnds",
+]
+
+# catch non-Table files
+nonTable = [
+    "CMIP5_grids",  # CMIP5
+    "CMIP6_coordinate.json",
+    "CMIP6_formula_terms.json",
+    "CMIP6_grids.json",
+    "CMIP6_input_example.json",
+    "CMIP6_CV.json",
+    "CORDEX-CMIP6_coordinate.json",  # CORDEX (CMIP6)
+    "CORDEX-CMIP6_CV.json",
+    "CORDEX-CMIP6_formula_terms.json",
+    "CORDEX-CMIP6_grids.json",
+    "CORDEX-CMIP6_remo_example.json",
+    "md5s",  # CMIP5
+    "CORDEX_grids",  # CORDEX (CMIP5)
+    "GeoMIP_grids",  # GeoMIP (CMIP5)
+    "LUCID_grids",  # LUCID (CMIP5)
+]
+# deal with IPCC_table_A5
+specialTable = [
+    "IPCC_table_A5",
+]
+
+# MIP eras with json formatted tables
+jsonMipIds = ["CMIP6", "CMIP6Plus", "cordex-cmip6"]
+
+# variable attributes compared by the table diff
+diffAttrs = ["units", "dimensions", "cell_methods", "frequency"]
 
 # %% function defs
 
 
-def readJsonTable(tableFilePath) -> dict:
-    with open(tableFilePath, "r") as f:
-        aDic = json.load(f)
+def countTableVars(varKeys, exclusionList=[]) -> int:
+    """
+    Quiet version of trimReportVar, take a list of variable keys and
+    return the count used for reporting
+    """
+    # if exclusionList not none - hack for IPCC_table_A5
+    if exclusionList:
+        varList = [x for x in varKeys if x not in exclusionList]
+        varList.extend(["rsf", "rsfcs", "rlf", "rlfcs"])
+    else:
+        varList = [x for x in varKeys if x not in cmipCoords]
 
-    return aDic
+    return len(varList)
 
 
-def readTxtTable(tableFilePath) -> dict:
+def diffTableSets(fpA, fpB) -> dict:
+    """
+    Compare two fingerprintTableSet outputs in linear time, only variables
+    with differing hashes have their attributes compared
+    """
+    added = sorted(x for x in fpB if x not in fpA)
+    removed = sorted(x for x in fpA if x not in fpB)
+    changed = {}
+    for var in sorted(fpA):
+        if var not in fpB or fpA[var][0] == fpB[var][0]:
+            continue
+        attrsA, attrsB = fpA[var][1], fpB[var][1]
+        changed[var] = {
+            kw: (attrsA.get(kw), attrsB.get(kw))
+            for kw in sorted(set(attrsA) | set(attrsB))
+            if attrsA.get(kw) != attrsB.get(kw)
+        }
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def fingerprintTableSet(tablePath, mipId, attrs=diffAttrs) -> dict:
+    """
+    Read all tables matching tablePath, return {"tableId/varName": (hash,
+    attrs)} for every variable entry (coordinate variables excluded)
+    """
+    tableFiles = glob.glob(os.path.join(tablePath))
+    tableFiles.sort()
+    fps = {}
+    for table in tableFiles:
+        if table.split("/")[-1] in nonTable:
+            continue
+        if mipId in jsonMipIds:
+            aDic = readJsonTable(table)
+            key = "variable_entry"
+            header = aDic.get("Header", {})
+        else:
+            aDic = readTxtTable(table)
+            key = "variable"
+            header = aDic.get("general", {})
+        tableId = header.get("table_id", table.split("/")[-1].split("_")[-1])
+        tableId = tableId.replace("Table ", "").split(".")[0]
+        for varName, varDict in aDic[key].items():
+            if varName in cmipCoords:
+                continue
+            fps["/".join([tableId, varName])] = fingerprintVar(
+                varDict, header.get("frequency", ""), attrs
+            )
+
+    return fps
+
+
+def fingerprintVar(varDict, frequency="", attrs=diffAttrs) -> tuple:
+    """
+    Stable (hash, attrs) for a variable entry from readTxtTable or
+    readJsonTable - list attributes are space joined and frequency falls
+    back to the table header value
+    """
+    norm = {}
+    for kw in attrs:
+        val = varDict.get(kw, frequency if kw == "frequency" else "")
+        if isinstance(val, list):
+            val = " ".join(val)
+        norm[kw] = " ".join(str(val).split())
+    h = hashlib.sha1(json.dumps(norm, sort_keys=True).encode("utf-8"))
+
+    return h.hexdigest(), norm
+
+
+def gitListRefs(repoPath, refType="tags", tablePath="Tables") -> list:
+    """
+    List (ref, date) pairs of a local git repo in time order, either all tags
+    or all first-parent commits that touched tablePath
+    """
+    if refType == "tags":
+        cmd = [
+            "for-each-ref",
+            "--sort=creatordate",
+            "--format=%(refname:short)%09%(creatordate:short)",
+            "refs/tags",
+        ]
+    else:
+        cmd = ["log", "--first-parent", "--reverse", "--format=%H%x09%cs", "--"]
+        cmd.append(tablePath)
+    r = subprocess.run(
+        ["git", "-C", repoPath] + cmd, capture_output=True, text=True, check=True
+    )
+    refs = []
+    for line in r.stdout.splitlines():
+        ref, date = line.split("\t")
+        refs.append((ref, date))
+
+    return refs
+
+
+def gitReadBlobs(repoPath, blobHashes):
+    """
+    Stream blob contents straight from the git object store, using a single
+    git cat-file --batch process - yields (blobHash, text)
+    """
+    p = subprocess.Popen(
+        ["git", "-C", repoPath, "cat-file", "--batch"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        for blobHash in blobHashes:
+            p.stdin.write((blobHash + "\n").encode("utf-8"))
+            p.stdin.flush()
+            header = p.stdout.readline().decode("utf-8").split()
+            if header[-1] == "missing":
+                raise KeyError("Blob {} missing from {}".format(blobHash, repoPath))
+            size = int(header[2])
+            blob = p.stdout.read(size)
+            p.stdout.read(1)  # trailing newline
+            # match open() universal newline handling
+            text = io.StringIO(blob.decode("utf-8"), newline=None).read()
+            yield blobHash, text
+    finally:
+        p.stdin.close()
+        p.wait()
+
+
+def gitTableBlobs(repoPath, ref, tablePath="Tables") -> list:
+    """
+    List (fileName, blobHash) for all table files at ref, without a checkout
+    """
+    r = subprocess.run(
+        ["git", "-C", repoPath, "ls-tree", ref, tablePath.rstrip("/") + "/"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    blobs = []
+    for line in r.stdout.splitlines():
+        info, path = line.split("\t", 1)
+        _, objType, blobHash = info.split()
+        if objType != "blob":
+            continue
+        blobs.append((path.split("/")[-1], blobHash))
+    blobs.sort()
+
+    return blobs
+
+
+def parseTableBlob(args) -> tuple:
+    """
+    Parse table text and return (blobHash, varKeys), varKeys is None if the
+    table could not be parsed - top level so it can be sent to a process pool
+    """
+    blobHash, text, isJson = args
+    try:
+        if isJson:
+            aDic = json.loads(text)
+            key = "variable_entry"
+        else:
+            aDic = parseTxtTable(text)
+            key = "variable"
+        varKeys = list(aDic[key].keys())
+    except Exception:
+        varKeys = None
+
+    return blobHash, varKeys
+
+
+def parseTxtTable(tableText) -> dict:
     """
     function lifted from the CMOR2.8 library, see
     https://github.com/PCMDI/cmor/blob/CMOR-2.8.0/Lib/check_CMOR_compliant.py#L119-L199
+    reworked to take table text so git blobs can be parsed without a checkout
     """
 
     lists_kw = [
@@ -53,13 +300,10 @@ def readTxtTable(tableFilePath) -> dict:
         "ignored",
         "optional",
     ]
-    f = open(tableFilePath, "r", encoding="utf-8")
-    blob = f.read().encode("utf-8")
+    blob = tableText.encode("utf-8")
     m5 = hashlib.md5(blob)
     m5 = m5.hexdigest()
-    f.seek(0)
-    ln = f.readlines()
-    f.close()
+    ln = io.StringIO(tableText).readlines()
     header = 1
     gen_attributes = {"actual_md5": m5}
     while header:
@@ -129,33 +373,27 @@ def readTxtTable(tableFilePath) -> dict:
     return e
 
 
-def reportMipEra(tablePath, mipId, exclusionList=[]) -> None:
+def readJsonTable(tableFilePath) -> dict:
+    with open(tableFilePath, "r") as f:
+        aDic = json.load(f)
+
+    return aDic
+
+
+def readTxtTable(tableFilePath) -> dict:
+    """
+    Read a CMOR2 text table from disk, see parseTxtTable
+    """
+    with open(tableFilePath, "r", encoding="utf-8") as f:
+        tableText = f.read()
+
+    return parseTxtTable(tableText)
+
+
+def reportMipEra(tablePath, mipId, exclusionList=[]) -> tuple:
     print("Processing:", mipId)
     tableFiles = glob.glob(os.path.join(tablePath))
     tableFiles.sort()  # add sort before processing
-    # catch non-Table files
-    nonTable = [
-        "CMIP5_grids",  # CMIP5
-        "CMIP6_coordinate.json",
-        "CMIP6_formula_terms.json",
-        "CMIP6_grids.json",
-        "CMIP6_input_example.json",
-        "CMIP6_CV.json",
-        "CORDEX-CMIP6_coordinate.json",  # CORDEX (CMIP6)
-        "CORDEX-CMIP6_CV.json",
-        "CORDEX-CMIP6_formula_terms.json",
-        "CORDEX-CMIP6_grids.json",
-        "CORDEX-CMIP6_remo_example.json",
-        "md5s",  # CMIP5
-        "CORDEX_grids",  # CORDEX (CMIP5)
-        "GeoMIP_grids",  # GeoMIP (CMIP5)
-        "LUCID_grids",  # LUCID (CMIP5)
-    ]
-    # deal with IPCC_table_A5
-    specialTable = [
-        "IPCC_table_A5",
-    ]
-
     varCount, tableCount = [0 for _ in range(2)]
     for table in tableFiles:
         # check for non-Table files
@@ -165,7 +403,7 @@ def reportMipEra(tablePath, mipId, exclusionList=[]) -> None:
             continue
         print("table:", trimPath(table))
         tableCount = tableCount + 1
-        if mipId in ["CMIP6", "CMIP6Plus", "cordex-cmip6"]:
+        if mipId in jsonMipIds:
             aDic = readJsonTable(table)
             key = "variable_entry"
         else:
@@ -180,6 +418,122 @@ def reportMipEra(tablePath, mipId, exclusionList=[]) -> None:
         print("-----")
     print("total", mipId, "tables:", tableCount, "vars:", varCount)
 
+    return tableCount, varCount
+
+
+def reportMipHistory(
+    repoPath,
+    mipId,
+    exclusionList=[],
+    refType="tags",
+    tablePath="Tables",
+    cacheFile=None,
+    csvFile=None,
+    workers=None,
+) -> list:
+    """
+    Walk every tag (or commit) of a local cmor-tables repo and report table
+    and variable counts over time. Table blobs are read from the object store
+    and parsed once per blob hash, unchanged tables are reused across refs
+    """
+    print("Processing history:", mipId, trimPath(repoPath))
+    refs = gitListRefs(repoPath, refType, tablePath)
+    isJson = mipId in jsonMipIds
+
+    # blob hash: varKeys, optionally persisted between runs
+    blobCache = {}
+    if cacheFile is not None and os.path.exists(cacheFile):
+        with open(cacheFile, "r") as f:
+            blobCache = json.load(f)
+
+    # list tables per ref, collect unique unparsed blobs
+    refTables = {}
+    newBlobs = []
+    for ref, _ in refs:
+        refTables[ref] = [
+            (name, blobHash)
+            for name, blobHash in gitTableBlobs(repoPath, ref, tablePath)
+            if name not in nonTable
+        ]
+        for _, blobHash in refTables[ref]:
+            if blobHash not in blobCache:
+                blobCache[blobHash] = None
+                newBlobs.append(blobHash)
+    print(
+        "refs:",
+        len(refs),
+        "unique blobs:",
+        len(blobCache),
+        "to parse:",
+        len(newBlobs),
+    )
+
+    # parse new blobs in parallel, bounded in-flight so blob text is streamed
+    if newBlobs:
+        maxInFlight = 4 * (workers or os.cpu_count() or 1)
+        # spawn - forked workers would inherit the cat-file stdin pipe
+        ctx = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=ctx) as ex:
+            inFlight = set()
+            for newHash, text in gitReadBlobs(repoPath, newBlobs):
+                if len(inFlight) >= maxInFlight:
+                    done, inFlight = concurrent.futures.wait(
+                        inFlight, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for fut in done:
+                        blobHash, varKeys = fut.result()
+                        blobCache[blobHash] = varKeys
+                inFlight.add(ex.submit(parseTableBlob, (newHash, text, isJson)))
+            for fut in concurrent.futures.as_completed(inFlight):
+                blobHash, varKeys = fut.result()
+                blobCache[blobHash] = varKeys
+    if cacheFile is not None:
+        with open(cacheFile, "w") as f:
+            json.dump(blobCache, f)
+
+    # count per ref
+    history = []
+    for ref, date in refs:
+        varCount, tableCount = [0 for _ in range(2)]
+        for name, blobHash in refTables[ref]:
+            varKeys = blobCache[blobHash]
+            if varKeys is None:
+                print("skipping unparseable:", ref, name)
+                continue
+            tableCount = tableCount + 1
+            if name in specialTable:
+                varCount = varCount + countTableVars(varKeys, exclusionList)
+            else:
+                varCount = varCount + countTableVars(varKeys)
+        print(ref, date, "tables:", tableCount, "vars:", varCount)
+        history.append((ref, date, tableCount, varCount))
+
+    if csvFile is not None:
+        with open(csvFile, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["ref", "date", "tables", "vars"])
+            w.writerows(history)
+
+    return history
+
+
+def reportTableDiff(tablePathA, mipIdA, tablePathB, mipIdB) -> dict:
+    """
+    Report added, removed and changed variables between two table sets
+    """
+    print("Diffing:", mipIdA, trimPath(tablePathA), "->", mipIdB, trimPath(tablePathB))
+    diff = diffTableSets(
+        fingerprintTableSet(tablePathA, mipIdA), fingerprintTableSet(tablePathB, mipIdB)
+    )
+    print("added:", len(diff["added"]), diff["added"])
+    print("removed:", len(diff["removed"]), diff["removed"])
+    print("changed:", len(diff["changed"]))
+    for var, attrs in diff["changed"].items():
+        for kw, (old, new) in attrs.items():
+            print(" ", var, kw + ":", repr(old), "->", repr(new))
+
+    return diff
+
 
 def trimPath(filePath):
     """
@@ -194,34 +548,6 @@ def trimReportVar(tableDict, key, exclusionList=[]) -> list:
     """
     Take a table dictionary, parse the variable subDict and report
     """
-    cmipCoords = [
-        "a",
-        "a_bnds",
-        "ap",
-        "ap_bnds",
-        "az",
-        "az_bnds",
-        "b",
-        "b_bnds",
-        "bz",
-        "bz_bnds",
-        "depth",
-        "depth_c",
-        "eta",
-        "href",
-        "k_c",
-        "nsigma",
-        "p0",
-        "ptop",
-        "sigma",
-        "sigma_bnds",
-        "z1",
-        "z2",
-        # "zfull",  # fixed field CMIP6_fx.json
-        # "zhalf", # fixed field CMIP6_CF3hr.json
-        "zlev",
-        "zlev_bnds",
-    ]
     varKeys = list(tableDict[key].keys())
     # trim out coord vars
     varList = [x for x in varKeys if x not in cmipCoords]
@@ -470,72 +796,118 @@ varListA5 = [
 ]
 
 # %% start to iterate over tables
-timeNow = datetime.datetime.now()
-timeFormat = timeNow.strftime("%y%m%d_%H%M%S")
-print("-----")
-print("Process time:", timeFormat)
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/cmip3-cmor-tables/Tables/*", "CMIP3", varListA5
-)  # good 143
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/cmip5-cmor-tables/Tables/*", "CMIP5"
-)  # good 986 (zfull, zhalf added back in)
-print("-----")
-print()
-print("-----")
-reportMipEra("/Users/durack1/sync/git/cmip6-cmor-tables/Tables/*", "CMIP6")  # good 2062
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/mip-cmor-tables/Tables/*", "CMIP6Plus"
-)  # good 2049
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/cfmip1-cmor-tables/Tables/*", "cfmip1"
-)  # good 149
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/c-lamp1-cmor-tables/Tables/*", "c-lamp1"
-)  # good 88
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/iaemip1-cmor-tables/Tables/*", "iaemip1"
-)  # good 146
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/cordex-cmor-tables/Tables/*", "cordex"
-)  # good 207
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/geomip-cmor-tables/Tables/*", "geomip"
-)  # good 1142
-print("-----")
-print()
-print("-----")
-reportMipEra("/Users/durack1/sync/git/lucid-cmor-tables/Tables/*", "lucid")  # good 979
-print("-----")
-print()
-print("-----")
-reportMipEra("/Users/durack1/sync/git/pmip3-cmor-tables/Tables/*", "pmip3")  # good 810
-print("-----")
-print()
-print("-----")
-reportMipEra(
-    "/Users/durack1/sync/git/cordex-cmip6-cmor-tables/Tables/*",
-    "cordex-cmip6",
-)  # good 565
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count CMOR table variables")
+    parser.add_argument(
+        "--history",
+        nargs=2,
+        metavar=("REPOPATH", "MIPID"),
+        help="walk git history of a local cmor-tables repo",
+    )
+    parser.add_argument(
+        "--commits", action="store_true", help="walk commits rather than tags"
+    )
+    parser.add_argument("--cache", help="json blob parse cache, reused across runs")
+    parser.add_argument("--csv", help="write history counts to csv")
+    parser.add_argument("--workers", type=int, help="parse worker processes")
+    parser.add_argument(
+        "--diff",
+        nargs=4,
+        metavar=("TABLEPATHA", "MIPIDA", "TABLEPATHB", "MIPIDB"),
+        help="attribute level diff of two table sets",
+    )
+    args = parser.parse_args()
+
+    if args.diff:
+        reportTableDiff(*args.diff)
+        raise SystemExit(0)
+
+    if args.history:
+        repoPath, mipId = args.history
+        exclusionList = varListA5 if mipId == "CMIP3" else []
+        reportMipHistory(
+            repoPath,
+            mipId,
+            exclusionList,
+            refType="commits" if args.commits else "tags",
+            cacheFile=args.cache,
+            csvFile=args.csv,
+            workers=args.workers,
+        )
+        raise SystemExit(0)
+
+    timeNow = datetime.datetime.now()
+    timeFormat = timeNow.strftime("%y%m%d_%H%M%S")
+    print("-----")
+    print("Process time:", timeFormat)
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cmip3-cmor-tables/Tables/*", "CMIP3", varListA5
+    )  # good 143
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cmip5-cmor-tables/Tables/*", "CMIP5"
+    )  # good 986 (zfull, zhalf added back in)
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cmip6-cmor-tables/Tables/*", "CMIP6"
+    )  # good 2062
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/mip-cmor-tables/Tables/*", "CMIP6Plus"
+    )  # good 2049
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cfmip1-cmor-tables/Tables/*", "cfmip1"
+    )  # good 149
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/c-lamp1-cmor-tables/Tables/*", "c-lamp1"
+    )  # good 88
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/iaemip1-cmor-tables/Tables/*", "iaemip1"
+    )  # good 146
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cordex-cmor-tables/Tables/*", "cordex"
+    )  # good 207
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/geomip-cmor-tables/Tables/*", "geomip"
+    )  # good 1142
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/lucid-cmor-tables/Tables/*", "lucid"
+    )  # good 979
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/pmip3-cmor-tables/Tables/*", "pmip3"
+    )  # good 810
+    print("-----")
+    print()
+    print("-----")
+    reportMipEra(
+        "/Users/durack1/sync/git/cordex-cmip6-cmor-tables/Tables/*",
+        "cordex-cmip6",
+    )  # good 565
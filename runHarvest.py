@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:40:18 2026
+
+Sharded citation harvest across nodes/API keys using a shared SQLite work
+queue, see MIPSummLib.harvest
+
+e.g.
+python runHarvest.py enqueue --db harvest.sqlite
+python runHarvest.py work --db harvest.sqlite --wosKey node1/WoSKey.txt \\
+    --serpKey node1/SerpKey.txt --sleep 1  # one per node/key
+python runHarvest.py status --db harvest.sqlite
+python runHarvest.py merge --db harvest.sqlite --outJson 261019.json
+
+PJD 19 Oct 2026     - Started
+
+@author: durack1
+"""
+
+# %% imports
+import argparse
+import json
+import os
+
+from MIPSummLib import (
+    enqueueRegistry,
+    loadPublications,
+    mergeResults,
+    openQueue,
+    queueStatus,
+    runWorker,
+)
+
+# %% run harvest
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CMIPSummary sharded harvest")
+    parser.add_argument("command", choices=["enqueue", "work", "status", "merge"])
+    parser.add_argument("--db", default="harvest.sqlite", help="queue database")
+    parser.add_argument("--publications", default="publications.json")
+    parser.add_argument("--group", help="registry group to enqueue")
+    parser.add_argument(
+        "--noGsch", dest="gsch", action="store_false", help="skip Scholar jobs"
+    )
+    parser.add_argument("--owner", help="worker id, default host-pid")
+    parser.add_argument("--kinds", nargs="*", default=["wos", "gsch"])
+    parser.add_argument("--wosKey", help="WoS API key file for this worker")
+    parser.add_argument("--serpKey", help="SerpAPI key file for this worker")
+    parser.add_argument("--sleep", type=float, default=0.0, help="secs between jobs")
+    parser.add_argument("--leaseSecs", type=int, default=600)
+    parser.add_argument("--maxAttempts", type=int, default=5)
+    parser.add_argument("--inJson", help="snapshot to merge results into")
+    parser.add_argument("--outJson", help="merged snapshot output")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        conn = openQueue(args.db)
+        added = enqueueRegistry(
+            conn, loadPublications(args.publications), args.group, args.gsch
+        )
+        print("queued:", added, "jobs")
+        print(queueStatus(conn))
+    elif args.command == "work":
+        import MIPSummLib.network
+
+        if args.wosKey:
+            MIPSummLib.network.keyFiles["wos"] = args.wosKey
+        if args.serpKey:
+            MIPSummLib.network.keyFiles["gsch"] = args.serpKey
+        done = runWorker(
+            args.db,
+            owner=args.owner,
+            kinds=args.kinds,
+            leaseSecs=args.leaseSecs,
+            maxAttempts=args.maxAttempts,
+            sleep=args.sleep,
+        )
+        print("completed:", done, "jobs")
+    elif args.command == "status":
+        print(queueStatus(openQueue(args.db)))
+    elif args.command == "merge":
+        dataDic = {}
+        if args.inJson and os.path.exists(args.inJson):
+            with open(args.inJson, "r") as f:
+                dataDic = json.load(f)
+        dataDic = mergeResults(openQueue(args.db), dataDic)
+        if args.outJson:
+            with open(args.outJson, "w") as f:
+                json.dump(
+                    dataDic,
+                    f,
+                    ensure_ascii=True,
+                    sort_keys=True,
+                    indent=4,
+                    separators=(",", ":"),
+                )
+        print("merged:", len(dataDic), "records")
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:05 2026
+
+Headless pipeline for the notebook harvest, store, aggregate and render
+steps plus the getVarCounts table audit. Steps form a DAG with declared
+inputs and outputs; a step is skipped when its input fingerprint matches
+the last run and its outputs exist, independent branches run in parallel
+(CPU bound and plotting steps in worker processes, network/io steps in
+threads). Fingerprints cover step parameters, inputs, the step function
+source and the library modules it calls, so code changes rerun the step
+
+    fetch ------> store ---> render
+    aggregate --------------/
+    table-audit
+
+e.g. python runPipeline.py --outPath pipeline \\
+        --tables CMIP6=/path/cmip6-cmor-tables/Tables/*
+
+PJD 19 Oct 2026     - Started
+PJD 19 Oct 2026     - Process executor for CPU steps, code in fingerprints
+
+@author: durack1
+"""
+
+# %% imports
+import argparse
+import concurrent.futures
+import datetime
+import glob
+import hashlib
+import inspect
+import json
+import os
+
+# %% define step code dependencies
+here = os.path.dirname(os.path.abspath(__file__))
+libCode = lambda *x: [os.path.join(here, y) for y in x]
+
+# %% function defs
+
+
+def fingerprint(step) -> str:
+    """
+    Hash step parameters, the step function source, the library code it
+    calls and the content of all step input files
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(step["params"], sort_keys=True).encode("utf-8"))
+    h.update(inspect.getsource(step["func"]).encode("utf-8"))
+    for filePath in step["code"]:
+        with open(filePath, "rb") as f:
+            h.update(f.read())
+    for filePath in stepInputs(step):
+        h.update(filePath.encode("utf-8"))
+        with open(filePath, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+
+    return h.hexdigest()
+
+
+def makeSteps(args) -> dict:
+    """
+    Declare pipeline steps - deps, inputs (files/globs), outputs, params,
+    library code and executor ("thread" for network/io, "process" for CPU)
+    """
+    timeNow = datetime.datetime.now()
+    dateFormat = timeNow.strftime("%y%m%d")
+    out = lambda x: os.path.join(args.outPath, x)
+    tables = dict(x.split("=", 1) for x in args.tables)
+
+    steps = {
+        "fetch": {
+            "deps": [],
+            "inputs": [args.publications] + args.wosExport,
+            "outputs": [out("fetch.json")],
+            # network step - refresh at most once per day
+            "params": {"date": dateFormat, "gsch": args.gsch},
+            "func": stepFetch,
+            "code": libCode(
+                "MIPSummLib/__init__.py",
+                "MIPSummLib/network.py",
+                "MIPSummLib/numeric.py",
+            ),
+            "executor": "thread",
+        },
+        "store": {
+            "deps": ["fetch"],
+            "inputs": [out("fetch.json")],
+            "outputs": [out("".join([dateFormat, ".json"]))],
+            "params": {},
+            "func": stepStore,
+            "code": [],
+            "executor": "thread",
+        },
+        "aggregate": {
+            "deps": [],
+            "inputs": [
+                os.path.join(args.footprintPath, "*_datasets_*_footprint_CMIP6_*.csv")
+            ],
+            "outputs": [out("footprint.npz")],
+            "params": {},
+            "func": stepAggregate,
+            "code": libCode("MIPSummLib/__init__.py", "MIPSummLib/numeric.py"),
+            "executor": "process",
+        },
+        "render": {
+            "deps": ["store", "aggregate"],
+            "inputs": [
+                out("footprint.npz"),
+                out("".join([dateFormat, ".json"])),
+                args.publications,
+            ],
+            "outputs": [out("Fig2.svg"), out("Fig4.svg")],
+            "params": {},
+            "func": stepRender,
+            "code": libCode("MIPSummLib/__init__.py"),
+            "executor": "process",
+        },
+        "table-audit": {
+            "deps": [],
+            "inputs": list(tables.values()),
+            "outputs": [out("tableCounts.json")],
+            "params": {"tables": tables},
+            "func": stepTableAudit,
+            "code": libCode("getVarCounts.py"),
+            "executor": "process",
+        },
+    }
+    for name, step in steps.items():
+        step["name"] = name
+
+    return steps
+
+
+def runPipeline(steps, statePath, stepNames=None, force=[], workers=None) -> dict:
+    """
+    Run steps in dependency order, ready steps are submitted together so
+    independent branches run in parallel. Returns {step: "ran"|"skipped"}
+    """
+    if stepNames is None:
+        stepNames = list(steps.keys())
+    state = {}
+    if os.path.exists(statePath):
+        with open(statePath, "r") as f:
+            state = json.load(f)
+
+    status = {}
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers
+    ) as threadEx, concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers
+    ) as procEx:
+        executors = {"thread": threadEx, "process": procEx}
+        while len(status) < len(stepNames):
+            # submit steps with all selected deps complete
+            for name in stepNames:
+                if name in status or name in pending.values():
+                    continue
+                deps = [x for x in steps[name]["deps"] if x in stepNames]
+                if any(x not in status for x in deps):
+                    continue
+                # upstream outputs are inputs, so only changed content reruns
+                upToDate = (
+                    name not in force
+                    and state.get(name) == fingerprint(steps[name])
+                    and all(os.path.exists(x) for x in steps[name]["outputs"])
+                )
+                if upToDate:
+                    print("skipping:", name)
+                    status[name] = "skipped"
+                    continue
+                print("running:", name)
+                ex = executors[steps[name]["executor"]]
+                pending[ex.submit(steps[name]["func"], steps[name])] = name
+            if not pending:
+                continue
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for fut in done:
+                name = pending.pop(fut)
+                fut.result()  # raise step errors
+                state[name] = fingerprint(steps[name])
+                status[name] = "ran"
+                print("complete:", name)
+                with open(statePath, "w") as f:
+                    json.dump(state, f, sort_keys=True, indent=4)
+
+    return status
+
+
+def stepAggregate(step) -> None:
+    """
+    Load ESGF footprint CSVs into the notebook arr2 layout
+    """
+    import numpy as np
+    from MIPSummLib import readFootprintCsvs
+
+    csvPath = os.path.dirname(step["inputs"][0])
+    files, dateList, arr2 = readFootprintCsvs(csvPath)
+    np.savez(step["outputs"][0], arr2=arr2, labels=np.array(list(files.keys())))
+
+
+def stepFetch(step) -> None:
+    """
+    Harvest WoS/Google Scholar citations for all registry publications,
+    WoS export files are used in preference to API calls
+    """
+    import numpy as np
+    from MIPSummLib import harvestPublications, loadPublications, loadWosExports
+
+    # create a filled pad list based on FANGIO 1990 published to present
+    currentYr = datetime.date.today().year
+    citingYrsPad = [np.nan] * len(np.arange(1990, currentYr + 1))
+    registry = loadPublications(step["inputs"][0])
+    wosFiles = []
+    for inPath in step["inputs"][1:]:
+        wosFiles.extend(sorted(glob.glob(inPath)))
+    wosStats = {}
+    if wosFiles:
+        wosStats = loadWosExports(wosFiles, citingYrsPad)
+    dataDic = {}
+    if os.path.exists(step["outputs"][0]):
+        with open(step["outputs"][0], "r") as f:
+            dataDic = json.load(f)
+    dataDic = harvestPublications(
+        registry,
+        citingYrsPad,
+        dataDic=dataDic,
+        wosStats=wosStats,
+        gsch=step["params"]["gsch"],
+    )
+    with open(step["outputs"][0], "w") as f:
+        json.dump(dataDic, f)
+
+
+def stepInputs(step) -> list:
+    """
+    Expand step input globs to a sorted file list
+    """
+    filePaths = []
+    for inPath in step["inputs"]:
+        filePaths.extend(sorted(glob.glob(inPath)))
+
+    return filePaths
+
+
+def stepRender(step) -> None:
+    """
+    Render Fig2 (CMIP6 cumulative footprint) and Fig4 (CMIP6 Community MIP
+    total citations) headless
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from matplotlib.dates import AutoDateFormatter, AutoDateLocator
+
+    npz = np.load(step["inputs"][0])
+    arr2, labels = npz["arr2"], list(npz["labels"])
+    PBe15 = np.power(1024, 5)
+    TBe12 = np.power(1024, 4)
+    x = arr2[:, 0]
+    y = (arr2[:, 2:] / PBe15).swapaxes(0, 1)
+
+    fig = plt.figure(figsize=(9, 6), dpi=300)
+    ax = plt.subplot(1, 1, 1)
+    xtick_locator = AutoDateLocator()
+    ax.xaxis.set_major_locator(xtick_locator)
+    ax.xaxis.set_major_formatter(AutoDateFormatter(xtick_locator))
+    cm = plt.get_cmap("tab20c")
+    colList = [cm(1.0 * i / y.shape[0]) for i in range(y.shape[0])]
+    plt.stackplot(x - datetime.date(1970, 1, 1).toordinal(), y, colors=colList)
+    ax.set_title("Federated CMIP6 cumulative dataset footprint")
+    plt.xlabel("Date")
+    plt.ylabel("Dataset size (PetaByte, 1e15)")
+    plt.annotate(
+        "".join(
+            [
+                "CMIP6 total 'latest' datasets (TeraByte, 1e12): ",
+                str(int(arr2[-1, 1] / TBe12)),
+                " (",
+                str(len(labels) - 1),
+                " activities)",
+            ]
+        ),
+        xy=(0.02, 0.95),
+        xycoords="axes fraction",
+    )
+    fig.savefig(step["outputs"][0], format="svg")
+    plt.close(fig)
+
+    # Fig4 - community MIP totals
+    from MIPSummLib import loadPublications
+
+    with open(step["inputs"][1], "r") as f:
+        dataDic = json.load(f)
+    labs, valsum = [], []
+    for rec in loadPublications(step["inputs"][2]).group("community"):
+        if rec.key not in dataDic:
+            continue
+        labs.append(rec.strId.split(" (")[0])
+        valsum.append(np.nansum(np.array(dataDic[rec.key]["wosPad"], dtype=float)))
+    fig, ax = plt.subplots(figsize=(15, 5), dpi=300)
+    cm = plt.get_cmap("tab20c")
+    colList = [cm(1.0 * i / max(len(labs), 1)) for i in range(len(labs))]
+    b = ax.bar(labs, valsum, color=colList)
+    ax.bar_label(b, labs, label_type="edge", rotation=45, fontsize=10, padding=1)
+    ax.set_ylabel("Total citations")
+    ax.set_xlabel("CMIP6 Community MIP")
+    ax.set_xticks([])
+    fig.tight_layout()
+    fig.savefig(step["outputs"][1], format="svg")
+    plt.close(fig)
+
+
+def stepStore(step) -> None:
+    """
+    Write dated dataDic snapshot, same format as the notebook json files
+    """
+    with open(step["inputs"][0], "r") as f:
+        dataDic = json.load(f)
+    with open(step["outputs"][0], "w") as f:
+        json.dump(
+            dataDic,
+            f,
+            ensure_ascii=True,
+            sort_keys=True,
+            indent=4,
+            separators=(",", ":"),
+        )
+
+
+def stepTableAudit(step) -> None:
+    """
+    Run getVarCounts.reportMipEra over configured table globs
+    """
+    from getVarCounts import reportMipEra, varListA5
+
+    counts = {}
+    for mipId, tablePath in step["params"]["tables"].items():
+        exclusionList = varListA5 if mipId == "CMIP3" else []
+        tableCount, varCount = reportMipEra(tablePath, mipId, exclusionList)
+        counts[mipId] = {"tables": tableCount, "vars": varCount}
+    with open(step["outputs"][0], "w") as f:
+        json.dump(counts, f, sort_keys=True, indent=4)
+
+
+# %% run pipeline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CMIPSummary headless pipeline")
+    parser.add_argument("--outPath", default="pipeline", help="output directory")
+    parser.add_argument("--publications", default="publications.json")
+    parser.add_argument("--footprintPath", default="250501")
+    parser.add_argument(
+        "--wosExport", nargs="*", default=[], help="WoS export files (offline ingest)"
+    )
+    parser.add_argument(
+        "--tables", nargs="*", default=[], help="MIPID=tableGlob pairs to audit"
+    )
+    parser.add_argument(
+        "--noGsch", dest="gsch", action="store_false", help="skip Scholar queries"
+    )
+    parser.add_argument("--steps", nargs="*", help="subset of steps to run")
+    parser.add_argument("--force", nargs="*", default=[], help="steps to rerun")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    os.makedirs(args.outPath, exist_ok=True)
+    steps = makeSteps(args)
+    status = runPipeline(
+        steps,
+        os.path.join(args.outPath, "pipelineState.json"),
+        stepNames=args.steps,
+        force=args.force,
+        workers=args.workers,
+    )
+    print(status)